@@ -8,6 +8,7 @@ https://github.com/astral-sh/python-build-standalone.
 
 from __future__ import annotations
 
+import json
 import os
 import platform
 import re
@@ -18,24 +19,80 @@ import time
 from argparse import ArgumentParser, Namespace
 from collections import defaultdict
 from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
-import argcomplete
-import platformdirs
-from packaging.version import parse as parse_version
+if TYPE_CHECKING:
+    from tarfile import TarFile
+    from urllib.request import Request
+
+    from packaging.version import Version
+
+# Use the faster orjson package for our JSON files if it is available
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
 
 REPO = 'python-build-standalone'
 GITHUB_REPO = f'astral-sh/{REPO}'
 GITHUB_SITE = f'https://github.com/{GITHUB_REPO}'
+GITHUB_API = f'https://api.github.com/repos/{GITHUB_REPO}'
 LATEST_RELEASES = f'{GITHUB_SITE}/releases.atom'
 LATEST_RELEASE_TAG = f'{GITHUB_SITE}/releases/latest'
 
 # Sample release tag for documentation/usage examples
 SAMPL_RELEASE = '20240415'
 
+# I/O buffer sizes used when downloading and unpacking tar files
+DOWNLOAD_BUF_SIZE = 1024 * 1024
+ZST_READ_SIZE = 4 * 1024 * 1024
+TAR_BUF_SIZE = 1024 * 1024
+
+# Number of release files to download in parallel
+DOWNLOAD_WORKERS = 4
+
+# Number of small data files to read in parallel
+READ_WORKERS = 8
+
+# Max decompressed size of a zstd tar file to decompress in one shot
+ZST_ONESHOT_MAX = 256 * 1024 * 1024
+
+# Max number of files to pass to a single strip command
+STRIP_BATCH_MAX = 256
+
+# Age after which a leftover temporary or old version dir is removed
+STALE_DIR_SECS = 86400
+
+# Suffixes of the release archive files that we can install
+ARCHIVE_SUFFIXES = ('.tar.zst', '.tar.gz')
+
+# Pattern for a formal (i.e. not pre-release) Python version
+RELEASE_VERSION_RE = re.compile(r'\d+(\.\d+)*')
+
+# Pattern for a YYYYMMDD release tag
+RELEASE_TAG_RE = re.compile(r'([0-9]{4})([0-9]{2})([0-9]{2})')
+
+# Pattern for our own temporary or old version dir names, e.g.
+# ".3.12.1-tmp", ".3.12.1-tmp-tmp", or ".3.12.1-old-<pid>"
+STALE_DIR_RE = re.compile(r'\.[0-9].*-(?:tmp|tmp-tmp|old-([0-9]+))')
+
+# Namespace qualified atom feed tag names
+ATOM_ENTRY = '{http://www.w3.org/2005/Atom}entry'
+ATOM_TITLE = '{http://www.w3.org/2005/Atom}title'
+ATOM_UPDATED = '{http://www.w3.org/2005/Atom}updated'
+
+# Patterns to extract the fields we need from each release atom feed entry
+ATOM_ENTRY_RE = re.compile(r'<entry>(.*?)</entry>', re.DOTALL)
+ATOM_TITLE_RE = re.compile(r'<title>([^<]+)</title>')
+ATOM_UPDATED_RE = re.compile(r'<updated>([^<]+)</updated>')
+
 PROG = Path(__file__).stem
-CNFFILE = platformdirs.user_config_path(f'{PROG}-flags.conf')
+
+# The host system and machine, which do not change during a run
+SYSTEM = platform.system()
+MACHINE = platform.machine()
 
 # Default distributions for various platforms
 DISTRIBUTIONS = {
@@ -52,7 +109,7 @@ DISTRIBUTIONS = {
 
 def is_admin() -> bool:
     "Check if we are running as root"
-    if platform.system() == 'Windows':
+    if SYSTEM == 'Windows':
         import ctypes
 
         return ctypes.windll.shell32.IsUserAnAdmin() != 0  # type: ignore
@@ -60,6 +117,23 @@ def is_admin() -> bool:
     return os.geteuid() == 0
 
 
+def is_running(pid: int) -> bool:
+    "Check if a process with the given pid may still be running"
+    # On Windows, os.kill() would terminate the process so we can not
+    # use it to check, so just assume it is running
+    if pid == os.getpid() or SYSTEM == 'Windows':
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass
+
+    return True
+
+
 def get_version() -> str:
     "Return the version of this package"
     from importlib.metadata import version
@@ -77,55 +151,101 @@ def fmt(version, release) -> str:
     return f'{version} @ {release}'
 
 
-def get_json(file: Path) -> dict:
-    from json import load
+@lru_cache(maxsize=None)
+def parse_version(version: str) -> Version:
+    "Return parsed version object, cached since the same strings recur often"
+    from packaging.version import parse
+
+    return parse(version)
+
 
-    'Get JSON data from given file'
+# Cache of parsed JSON files, so each is read at most once per run
+json_cache: dict[Path, dict] = {}
+
+
+def get_json(file: Path) -> dict:
+    "Get JSON data from given file"
+    if (data := json_cache.get(file)) is not None:
+        return data
+
+    # Read the small file in one go and parse the bytes directly. This
+    # avoids the text file wrapper and incremental reads of load().
+    # Missing or unreadable files are not cached as they may be created
+    # later in this run.
     try:
-        with file.open() as fp:
-            return load(fp)
+        loads = orjson.loads if orjson else json.loads
+        data = json_cache[file] = loads(file.read_bytes())
+        return data
     except Exception:
         pass
 
     return {}
 
 
+def preload_json(files: Iterable[Path]) -> None:
+    "Read the given JSON files into the cache in parallel"
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Overlap the open/read latency of many small files, e.g. on a cold
+    # or network file system. Not worth the threads for a single file.
+    if len(files := list(files)) > 1:
+        with ThreadPoolExecutor(max_workers=READ_WORKERS) as executor:
+            executor.map(get_json, files)
+
+
 def set_json(file: Path, data: dict) -> str | None:
     "Set JSON data to given file"
-    from json import dump
-
     try:
-        with file.open('w') as fp:
-            dump(data, fp, indent=2)
+        # Encode all the data first and then write it in one go rather
+        # than as many small chunks as dump() would
+        if orjson:
+            text = orjson.dumps(data, option=orjson.OPT_INDENT_2)
+        else:
+            text = json.dumps(data, indent=2).encode()
+
+        file.write_bytes(text)
     except Exception as e:
+        json_cache.pop(file, None)
         return str(e)
 
+    json_cache[file] = data
     return None
 
 
-# The gh handle is an opaque github instance handle
-get_gh_handle = None
+@lru_cache(maxsize=None)
+def get_ssl_context() -> Any:
+    "Return the SSL context shared by all HTTPS requests"
+    # Otherwise each HTTPS connection creates a new default SSL context
+    # and so reloads all the system CA certificates.
+    import ssl
 
+    return ssl.create_default_context()
 
-def get_gh(args: Namespace) -> Any:
-    "Return a GitHub handle"
-    # The gh handle is a global to lazily create it only if/when needed
-    global get_gh_handle
-    if get_gh_handle:
-        return get_gh_handle
 
-    if args.github_access_token:
-        from github.Auth import Token
+# The url openers are shared by all URL fetches, keyed by whether they
+# follow redirects
+url_openers: dict[bool, Any] = {}
 
-        auth = Token(args.github_access_token)
-    else:
-        auth = None
 
-    # Save this handle globally for future use
-    from github import Github
+def open_url(url: str | Request, *, redirect: bool = True) -> Any:
+    "Open the given URL, optionally not following any redirect"
+    # The openers are created lazily only if/when needed. Without
+    # redirects a redirect response is raised as an HTTPError so the
+    # caller can read its headers.
+    if not (opener := url_openers.get(redirect)):
+        from urllib.request import HTTPRedirectHandler, HTTPSHandler, build_opener
+
+        class NoRedirectHandler(HTTPRedirectHandler):
+            def redirect_request(self, *args: Any, **kwargs: Any) -> None:
+                return None
+
+        handlers: list[Any] = [HTTPSHandler(context=get_ssl_context())]
+        if not redirect:
+            handlers.append(NoRedirectHandler())
 
-    get_gh_handle = Github(auth=auth)  # type: ignore
-    return get_gh_handle
+        opener = url_openers[redirect] = build_opener(*handlers)
+
+    return opener.open(url)
 
 
 def rm_path(path: Path) -> None:
@@ -138,48 +258,153 @@ def rm_path(path: Path) -> None:
         path.unlink()
 
 
+def extract_tar(tar: TarFile, extract_dir: str) -> None:
+    "Extract all members of an open tar file"
+    import tarfile
+
+    # Set the extraction filter explicitly where supported. The 'tar'
+    # filter keeps the archive's links and permissions as before but
+    # refuses members which would land outside the extract dir.
+    tar.extraction_filter = getattr(tarfile, 'tar_filter', None)
+
+    # Copy each member's data in large chunks rather than the default
+    tar.copybufsize = TAR_BUF_SIZE  # type: ignore[attr-defined]
+    tar.extractall(path=extract_dir)
+
+
 def unpack_zst(filename: str, extract_dir: str) -> None:
     "Unpack a zstandard compressed tar"
+    import io
     import tarfile
 
     import zstandard
 
     with open(filename, 'rb') as compressed:
         dctx = zstandard.ZstdDecompressor()
-        with dctx.stream_reader(compressed) as reader:
-            with tarfile.open(fileobj=reader, mode='r|') as tar:
-                tar.extractall(path=extract_dir)
 
+        # If the frame header records the decompressed size, and it is
+        # not too big, then decompress in one shot which is faster than
+        # streaming and lets tarfile read the result randomly.
+        try:
+            size = zstandard.frame_content_size(compressed.read(18))
+        except zstandard.ZstdError:
+            size = -1
+
+        compressed.seek(0)
+        if 0 < size <= ZST_ONESHOT_MAX:
+            data = dctx.decompress(compressed.read())
+            with tarfile.open(fileobj=io.BytesIO(data), mode='r:') as tar:
+                extract_tar(tar, extract_dir)
+            return
 
-def fetch(args: Namespace, release: str, url: str, tdir: Path) -> str | None:
-    "Fetch and unpack a release file"
-    from urllib.parse import unquote, urlparse
-    from urllib.request import urlretrieve
+        # Use large read sizes so streaming through these big tar files
+        # does not incur the overhead of many small reads
+        with dctx.stream_reader(compressed, read_size=ZST_READ_SIZE) as reader:
+            with tarfile.open(fileobj=reader, mode='r|', bufsize=TAR_BUF_SIZE) as tar:
+                extract_tar(tar, extract_dir)
+
+
+def unpack_gz(filename: str, extract_dir: str) -> None:
+    "Unpack a gzip compressed tar"
+    import tarfile
+
+    # Stream through the file in a single pass
+    with tarfile.open(filename, mode='r|gz', bufsize=TAR_BUF_SIZE) as tar:
+        extract_tar(tar, extract_dir)
 
-    error = None
-    tmpdir = tdir.with_name(f'{tdir.name}-tmp')
-    rm_path(tmpdir)
-    tmpdir.mkdir(parents=True)
+
+def download(args: Namespace, release: str, url: str) -> tuple[Path, str | None]:
+    "Download a release file to the cache, if not already cached"
+    from urllib.parse import unquote, urlparse
 
     filename_q = Path(urlparse(url).path).name
     filename = unquote(filename_q)
     cache_file = args._downloads / release / filename
     cache_file.parent.mkdir(parents=True, exist_ok=True)
 
-    if not cache_file.exists():
+    if cache_file.exists():
+        return cache_file, None
+
+    from urllib.error import HTTPError
+    from urllib.request import Request
+
+    # Download to a partial file first so an interrupted download is
+    # never taken as complete, and can be resumed from where it stopped
+    # by a later run
+    part_file = cache_file.with_name(f'{filename}.part')
+    try:
+        size = part_file.stat().st_size
+    except FileNotFoundError:
+        size = 0
+
+    headers = {'Range': f'bytes={size}-'} if size > 0 else {}
+
+    try:
         try:
-            urlretrieve(url, cache_file)
-        except Exception as e:
-            error = f'Failed to fetch "{url}": {e}'
+            resp = open_url(Request(url, headers=headers))
+        except HTTPError as e:
+            # Server can not resume from this partial file so start again
+            if e.code != 416:
+                raise
+
+            resp = open_url(url)
+
+        # Append if the server is resuming, else it is sending it all
+        mode = 'ab' if resp.getcode() == 206 else 'wb'
+        with resp, part_file.open(mode) as fp:
+            shutil.copyfileobj(resp, fp, DOWNLOAD_BUF_SIZE)
+
+        part_file.replace(cache_file)
+    except BaseException as e:
+        # Don't leave an empty partial file behind, e.g. if we were
+        # interrupted before any data arrived
+        try:
+            if part_file.stat().st_size == 0:
+                part_file.unlink()
+        except OSError:
+            pass
+
+        if not isinstance(e, Exception):
+            raise
+
+        return cache_file, f'Failed to fetch "{url}": {e}'
+
+    return cache_file, None
+
+
+def download_all(args: Namespace, release: str, urls: Iterable[str]) -> None:
+    "Download multiple release files to the cache in parallel"
+    from concurrent.futures import ThreadPoolExecutor, wait
+
+    # Only bother with parallel downloads if there are multiple files.
+    # Any errors are ignored here because fetch() will retry the
+    # download later and report the error then.
+    if len(urls := set(urls)) > 1:
+        workers = min(args.jobs or DOWNLOAD_WORKERS, len(urls))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(download, args, release, u) for u in urls]
+            try:
+                wait(futures)
+            except BaseException:
+                # E.g. on Ctrl-C, don't start any queued downloads. Only
+                # those already running are waited for on exit.
+                for future in futures:
+                    future.cancel()
+                raise
 
-    if error:
-        rm_path(cache_file)
-    else:
-        if filename.endswith('.zst'):
-            shutil.register_unpack_format('zst', ['.zst'], unpack_zst)
 
+def fetch(args: Namespace, release: str, url: str, tdir: Path) -> str | None:
+    "Fetch and unpack a release file"
+    tmpdir = tdir.with_name(f'{tdir.name}-tmp')
+    rm_path(tmpdir)
+    tmpdir.mkdir(parents=True)
+
+    cache_file, error = download(args, release, url)
+
+    if not error:
+        unpack = unpack_zst if cache_file.name.endswith('.zst') else unpack_gz
         try:
-            shutil.unpack_archive(cache_file, tmpdir)
+            unpack(str(cache_file), str(tmpdir))
         except Exception as e:
             error = f'Failed to unpack "{url}": {e}'
         else:
@@ -190,10 +415,10 @@ def fetch(args: Namespace, release: str, url: str, tdir: Path) -> str | None:
                 # requested
                 if args.include_source:
                     srcdir = idir / 'src'
-                    for subpath in pdir.iterdir():
-                        if subpath.name != idir.name:
-                            srcdir.mkdir(parents=True, exist_ok=True)
-                            subpath.replace(srcdir / subpath.name)
+                    if names := [n for n in os.listdir(pdir) if n != idir.name]:
+                        srcdir.mkdir(parents=True, exist_ok=True)
+                        for name in names:
+                            os.replace(pdir / name, srcdir / name)
 
                 pdir = idir
 
@@ -205,7 +430,7 @@ def fetch(args: Namespace, release: str, url: str, tdir: Path) -> str | None:
 
 def is_release_version(version: str) -> bool:
     "Check if a string is a formal Python release tag"
-    return version.replace('.', '').isdigit()
+    return bool(RELEASE_VERSION_RE.fullmatch(version))
 
 
 class VersionMatcher:
@@ -213,9 +438,31 @@ class VersionMatcher:
 
     def __init__(self, seq: Iterable[str]) -> None:
         self.seq = sorted(seq, key=parse_version, reverse=True)
+        self.seqset = set(self.seq)
+
+        # Index the versions by each of their dotted prefixes, e.g.
+        # "3.12.1" is listed under "3." and "3.12.". Each list keeps the
+        # highest version first, as per the sorted sequence.
+        self.prefixes: dict[str, list[str]] = defaultdict(list)
+        for full_version in self.seq:
+            parts = full_version.split('.')[:-1]
+            for n in range(1, len(parts) + 1):
+                self.prefixes['.'.join(parts[:n]) + '.'].append(full_version)
+
+        # Results of previous matches, as the same version is often
+        # matched more than once
+        self.cache: dict[tuple[str | None, bool], str | None] = {}
 
     def match(self, version: str | None, *, upgrade: bool = False) -> str | None:
         "Return full version string given a [possibly] part version prefix"
+        key = (version, upgrade)
+        if key not in self.cache:
+            self.cache[key] = self._match(version, upgrade)
+
+        return self.cache[key]
+
+    def _match(self, version: str | None, upgrade: bool) -> str | None:
+        "Match a version, the uncached implementation of match()"
 
         # If no version specified, return the latest release version
         if not version:
@@ -224,7 +471,7 @@ class VersionMatcher:
                     return version
             return None
 
-        if version in self.seq:
+        if version in self.seqset:
             return version
 
         is_release = is_release_version(version)
@@ -238,26 +485,32 @@ class VersionMatcher:
         if not version.endswith('.'):
             version += '.'
 
-        # Only allow upgrade of formal release to another formal
-        # release.
-        for full_version in self.seq:
-            if full_version.startswith(version):
-                if not upgrade or not is_release or is_release_version(full_version):
-                    return full_version
+        # Find the highest of the versions starting with this prefix. Only
+        # allow upgrade of formal release to another formal release.
+        for full_version in self.prefixes.get(version, ()):
+            if not upgrade or not is_release or is_release_version(full_version):
+                return full_version
 
         return None
 
 
 def iter_versions(args: Namespace) -> Iterator[Path]:
     "Iterate over all version dirs"
-    for f in args._versions.iterdir():
-        if (
-            f.is_dir()
-            and not f.is_symlink()
-            and f.name[0] != '.'
-            and f.name[0].isdigit()
-        ):
-            yield f
+    # The scandir entries give us the file type without a stat per entry
+    with os.scandir(args._versions) as it:
+        for entry in it:
+            if entry.name[0].isdigit() and entry.is_dir(follow_symlinks=False):
+                yield Path(entry.path)
+
+
+def get_installed(args: Namespace) -> set[str]:
+    "Return the set of installed version names"
+    # Scan the versions dir once per run, then keep the set current as
+    # versions are installed and removed, rather than probe each path
+    if args._installed is None:
+        args._installed = {p.name for p in iter_versions(args)}
+
+    return args._installed
 
 
 def get_version_names(args: Namespace) -> list[str]:
@@ -274,11 +527,15 @@ def get_version_names(args: Namespace) -> list[str]:
         if not args.version:
             args.parser.error('Must specify at least one version, or --all.')
 
-    all_names = set(f.name for f in iter_versions(args))
+    all_names = get_installed(args)
 
-    # Upconvert all user specified partial version names to full version names
-    matcher = VersionMatcher(all_names)
-    versions = [(matcher.match(v) or v) for v in args.version]
+    # Upconvert all user specified partial version names to full version
+    # names. No need to build a matcher if all are already full names.
+    if all(v in all_names for v in args.version):
+        versions = list(args.version)
+    else:
+        matcher = VersionMatcher(all_names)
+        versions = [(matcher.match(v) or v) for v in args.version]
 
     given = set(versions)
 
@@ -292,11 +549,11 @@ def get_version_names(args: Namespace) -> list[str]:
 
 def check_release_tag(release: str) -> str | None:
     "Check the specified release tag is valid"
-    if not release.isdigit() or len(release) != len(SAMPL_RELEASE):
+    if not (m := RELEASE_TAG_RE.fullmatch(release)):
         return 'Release must be a YYYYMMDD string.'
 
     try:
-        _ = date.fromisoformat(f'{release[:4]}-{release[4:6]}-{release[6:]}')
+        _ = date(int(m[1]), int(m[2]), int(m[3]))
     except Exception:
         return 'Release must be a YYYYMMDD date string.'
 
@@ -308,30 +565,55 @@ def check_release_tag(release: str) -> str | None:
 # rate-limits.
 def fetch_tags() -> Iterator[tuple[str, str]]:
     "Fetch the latest release tags from the GitHub release atom feed"
-    import xml.etree.ElementTree as et
-    from urllib.request import urlopen
-
     try:
-        with urlopen(LATEST_RELEASES) as url:
-            data = et.parse(url).getroot()
+        with open_url(LATEST_RELEASES) as url:
+            body = url.read()
     except Exception:
         sys.exit('Failed to fetch latest YYYYMMDD release atom file.')
 
-    for child in data.iter():
-        for entry in child.findall('{http://www.w3.org/2005/Atom}entry'):
-            tl = entry.findtext('{http://www.w3.org/2005/Atom}title')
-            dt = entry.findtext('{http://www.w3.org/2005/Atom}updated')
-            if tl and dt:
-                yield tl, dt
+    # The feed is small and regular so just pull out the 2 fields we
+    # want from each entry, only falling back to a full XML parse if the
+    # format is not what we expect.
+    found = False
+    for entry in ATOM_ENTRY_RE.findall(body.decode(errors='replace')):
+        tl = ATOM_TITLE_RE.search(entry)
+        dt = ATOM_UPDATED_RE.search(entry)
+        if tl and dt:
+            found = True
+            yield tl[1].strip(), dt[1].strip()
+
+    if found:
+        return
+
+    import io
+    import xml.etree.ElementTree as et
+
+    try:
+        for _, elem in et.iterparse(io.BytesIO(body)):
+            if elem.tag == ATOM_ENTRY:
+                tl = elem.findtext(ATOM_TITLE)
+                dt = elem.findtext(ATOM_UPDATED)
+                if tl and dt:
+                    yield tl, dt
+
+                elem.clear()
+    except Exception:
+        sys.exit('Failed to parse latest YYYYMMDD release atom file.')
 
 
 def fetch_tag_latest() -> str:
     "Fetch the latest release tag from the GitHub"
-    from urllib.request import urlopen
+    from urllib.error import HTTPError
 
+    # The latest release URL redirects to the URL of the latest tag, so
+    # just take the tag from the redirect rather than also fetching the
+    # release page it points to.
     try:
-        with urlopen(LATEST_RELEASE_TAG) as url:
+        with open_url(LATEST_RELEASE_TAG, redirect=False) as url:
             data = url.geturl()
+    except HTTPError as e:
+        if not (300 <= e.code < 400 and (data := e.headers.get('Location'))):
+            sys.exit('Failed to fetch latest YYYYMMDD release tag.')
     except Exception:
         sys.exit('Failed to fetch latest YYYYMMDD release tag.')
 
@@ -346,8 +628,13 @@ def get_release_tag(args: Namespace) -> str:
 
         return release
 
-    if args._latest_release.exists():
+    # Use the cached latest tag if it is recent enough. Just stat the
+    # file rather than first checking it exists.
+    try:
         stat = args._latest_release.stat()
+    except FileNotFoundError:
+        pass
+    else:
         if time.time() < (stat.st_mtime + int(args.cache_minutes * 60)):
             return args._latest_release.read_text().strip()
 
@@ -360,34 +647,25 @@ def get_release_tag(args: Namespace) -> str:
 
 def add_file(files: dict, tag: str, name: str, url: str) -> None:
     "Extract the implementation, version, and architecture from a filename"
-    if name.endswith('.tar.zst'):
-        name = name[:-8]
-    elif name.endswith('.tar.gz'):
-        name = name[:-7]
+    for suffix in ARCHIVE_SUFFIXES:
+        if name.endswith(suffix):
+            name = name[: -len(suffix)]
+            break
     else:
         return
 
     impl, ver, arch = name.split('-', 2)
 
     # Modern releases have a '+' in the name to separate the version
-    if '+' in ver:
-        ver, filetag = ver.split('+')
-        if filetag != tag:
-            return
-
-    if impl not in files:
-        files[impl] = {}
-
-    vers = files[impl]
-
-    if ver not in vers:
-        vers[ver] = {}
+    ver, sep, filetag = ver.partition('+')
+    if sep and filetag != tag:
+        return
 
-    vers[ver][arch] = url
+    files.setdefault(impl, {}).setdefault(ver, {})[arch] = url
 
 
-def get_release_files(args, tag, implementation: str | None = None) -> dict:
-    "Return the release files for the given tag"
+def load_release_files(args: Namespace, tag: str) -> dict:
+    "Load the release files for the given tag, fetching them if needed"
     # Look for tag data in our release cache
     jfile = args._releases / tag
     if not (files := get_json(jfile)):
@@ -395,19 +673,31 @@ def get_release_files(args, tag, implementation: str | None = None) -> dict:
         if jfile.exists():
             return {}
 
-        # Not in cache so fetch it (and also store in cache)
-        from github.GithubException import UnknownObjectException
+        # Not in cache so fetch it (and also store in cache). Note we
+        # use a direct REST API call because it returns the release and
+        # all its assets in a single request.
+        from urllib.error import HTTPError
+        from urllib.request import Request
 
-        gh = get_gh(args)
+        headers = {'Accept': 'application/vnd.github+json'}
+        if args.github_access_token:
+            headers['Authorization'] = f'Bearer {args.github_access_token}'
+
+        req = Request(f'{GITHUB_API}/releases/tags/{tag}', headers=headers)
         try:
-            release = gh.get_repo(GITHUB_REPO).get_release(tag)
-        except UnknownObjectException:
-            return {}
+            with open_url(req) as url:
+                release = json.load(url)
+        except HTTPError as e:
+            if e.code == 404:
+                return {}
+            sys.exit(f'Failed to fetch release {tag} info: {e}')
+        except Exception as e:
+            sys.exit(f'Failed to fetch release {tag} info: {e}')
 
         # Iterate over the release assets and store pertinent files in a
         # dict to return.
-        for asset in release.get_assets():
-            add_file(files, tag, asset.name, asset.browser_download_url)
+        for asset in release.get('assets', []):
+            add_file(files, tag, asset['name'], asset['browser_download_url'])
 
         if not files:
             sys.exit(f'Failed to fetch any files for release {tag}')
@@ -415,6 +705,18 @@ def get_release_files(args, tag, implementation: str | None = None) -> dict:
         if error := set_json(jfile, files):
             sys.exit(f'Failed to write release {tag} file {jfile}: {error}')
 
+    return files
+
+
+# Release files already loaded in this run, keyed by release tag
+release_files_cache: dict[str, dict] = {}
+
+
+def get_release_files(args, tag, implementation: str | None = None) -> dict:
+    "Return the release files for the given tag"
+    if (files := release_files_cache.get(tag)) is None:
+        files = release_files_cache[tag] = load_release_files(args, tag)
+
     return files.get(implementation, {}) if implementation else files
 
 
@@ -427,19 +729,23 @@ def update_version_symlinks(args: Namespace) -> None:
     # Record all the existing symlinks and version dirs
     oldlinks = {}
     vers = []
-    for path in base.iterdir():
-        if path.name[0] != '.' and path.name[0].isdigit():
-            if path.is_symlink():
-                oldlinks[path.name] = os.readlink(str(path))
-            else:
-                vers.append(path.name)
+    with os.scandir(base) as it:
+        for entry in it:
+            if entry.name[0].isdigit():
+                if entry.is_symlink():
+                    oldlinks[entry.name] = os.readlink(entry.path)
+                else:
+                    vers.append(entry.name)
 
     # Create a map of all the new major version links
     newlinks_all = defaultdict(set)
     pre_releases = set(v for v in vers if not is_release_version(v))
     for namevers in vers:
-        while '.' in namevers[:-1]:
-            namevers_major = namevers.rsplit('.', maxsplit=1)[0]
+        # Split once and then work up through each shorter prefix, e.g.
+        # 3.12.1 -> 3.12 -> 3
+        parts = namevers.split('.')
+        for n in range(len(parts) - 1, 0, -1):
+            namevers_major = '.'.join(parts[:n])
             newlinks_all[namevers_major].add(namevers)
 
             if namevers in pre_releases:
@@ -455,7 +761,7 @@ def update_version_symlinks(args: Namespace) -> None:
         if ver in pre_releases and (rels := (cands - pre_releases)):
             cands = rels
 
-        newlinks[ver] = sorted(cands, key=parse_version)[-1]
+        newlinks[ver] = max(cands, key=parse_version)
 
     # Remove all old or invalid existing links
     for name, tgt in oldlinks.items():
@@ -472,10 +778,12 @@ def update_version_symlinks(args: Namespace) -> None:
 
 def purge_unused_releases(args: Namespace) -> None:
     "Purge old releases that are no longer needed and have expired"
-    # Want to keep releases for versions that we currently have installed
-    keep = {
-        r for v in iter_versions(args) if (r := get_json(v / args._data).get('release'))
-    }
+    # Want to keep releases for versions that we currently have installed.
+    # Most data files are already cached by the command but read any
+    # that are not in parallel.
+    dfiles = [args._versions / v / args._data for v in get_installed(args)]
+    preload_json(f for f in dfiles if f not in json_cache)
+    keep = {r for f in dfiles if (r := get_json(f).get('release'))}
 
     # Add current release to keep list (even if not currently installed)
     if args._latest_release.exists():
@@ -484,26 +792,59 @@ def purge_unused_releases(args: Namespace) -> None:
     # Purge any release lists that are no longer used and have expired
     now_secs = time.time()
     end_secs = args.purge_days * 86400
-    for path in args._releases.iterdir():
-        if path.name not in keep:
-            if (path.stat().st_mtime + end_secs) < now_secs:
-                path.unlink()
-            else:
-                keep.add(path.name)
+    with os.scandir(args._releases) as it:
+        for entry in it:
+            if entry.name not in keep:
+                if (entry.stat().st_mtime + end_secs) < now_secs:
+                    os.unlink(entry.path)
+                else:
+                    keep.add(entry.name)
 
     # Purge any downloads for releases that have expired
-    for path in args._downloads.iterdir():
-        if path.name not in keep:
-            rm_path(path)
+    with os.scandir(args._downloads) as it:
+        for entry in it:
+            if entry.name not in keep:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+
+    # Remove any of our temporary or old version dirs left behind by an
+    # interrupted run. Only remove them once they are old enough that
+    # they can not belong to another run still in progress. Use the
+    # change time as a rename does not update the modification time.
+    # Old dirs are skipped while their owning process (which deletes them
+    # in the background) is still running.
+    with os.scandir(args._versions) as it:
+        for entry in it:
+            if not (m := STALE_DIR_RE.fullmatch(entry.name)):
+                continue
+
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+
+            if (pid := m.group(1)) and is_running(int(pid)):
+                continue
+
+            if (entry.stat().st_ctime + STALE_DIR_SECS) < now_secs:
+                shutil.rmtree(entry.path, ignore_errors=True)
 
 
 def show_list(args: Namespace) -> None:
     "Show a list of available releases"
-    latest = parse_version(get_release_tag(args))
-    releases = {r: d for r, d in fetch_tags()}
-    cached = set(p.name for p in args._releases.iterdir())
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Fetch the release feed in the background while we work out the
+    # latest release and read the local cache
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(lambda: list(fetch_tags()))
+        latest = parse_version(get_release_tag(args))
+        cached = set(os.listdir(args._releases))
+        releases = {r: d for r, d in future.result()}
+
+    re_match = re.compile(args.re_match) if args.re_match else None
     for release in sorted(cached.union(releases)):
-        if args.re_match and not re.search(args.re_match, release):
+        if re_match and not re_match.search(release):
             continue
 
         if dt_str := releases.get(release):
@@ -516,8 +857,13 @@ def show_list(args: Namespace) -> None:
             dts = '......................'
 
         if release in cached:
-            ddir = args._downloads / release
-            count = len(list(ddir.iterdir())) if ddir.exists() else 0
+            try:
+                # Don't count partial downloads
+                names = os.listdir(args._downloads / release)
+                count = sum(not n.endswith('.part') for n in names)
+            except FileNotFoundError:
+                count = 0
+
             app = f' cached + {count} downloaded files' if count > 0 else ' cached'
         else:
             app = ''
@@ -539,43 +885,80 @@ def get_title(desc: str) -> str:
     sys.exit('Must end description with a full stop.')
 
 
-def remove(args: Namespace, version: str) -> None:
-    "Remove a version"
+def remove(args: Namespace, version: str, *, background: bool = False) -> str | None:
+    "Remove a version, optionally in the background, returning its release"
     vdir = args._versions / version
-    if not vdir.exists():
-        return
+    if version not in get_installed(args):
+        return None
 
     # Touch the associated release file to ensure it lives until the
     # full purge time has expired if this was the last version using it
     if release := get_json(vdir / args._data).get('release'):
         (args._releases / release).touch()
 
-    shutil.rmtree(vdir)
+    json_cache.pop(vdir / args._data, None)
+    get_installed(args).discard(version)
 
+    if not background:
+        shutil.rmtree(vdir)
+        return release
+
+    # Rename the version dir out of the way (which is immediate), then
+    # delete it in a thread so we do not wait for a large tree removal.
+    # The thread is not a daemon so it completes before we exit.
+    from threading import Thread
+
+    olddir = vdir.with_name(f'.{version}-old-{os.getpid()}')
+    rm_path(olddir)
+    vdir.replace(olddir)
+    Thread(target=shutil.rmtree, args=(olddir,), kwargs={'ignore_errors': True}).start()
+    return release
 
-def strip_binaries(vdir: Path, distribution: str) -> bool:
+
+def strip_binaries(vdir: Path, distribution: str, jobs: int | None) -> bool:
     "Strip binaries from files in a version directory"
     from subprocess import DEVNULL, run
 
     # Only run the strip command on Linux hosts and for Linux distributions
-    was_stripped = False
-    if platform.system() == 'Linux' and '-linux-' in distribution:
-        for path in ('bin', 'lib'):
-            base = vdir / path
-            if not base.is_dir():
-                continue
+    if SYSTEM != 'Linux' or '-linux-' not in distribution:
+        return False
 
-            for file in base.iterdir():
-                if not file.is_symlink() and file.is_file():
-                    cmd = f'strip -p --strip-unneeded {file}'.split()
-                    try:
-                        run(cmd, stderr=DEVNULL)
-                    except Exception:
-                        pass
-                    else:
-                        was_stripped = True
+    files = []
+    for path in ('bin', 'lib'):
+        try:
+            it = os.scandir(vdir / path)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+
+        # A regular file, but not a symlink to one
+        with it:
+            for entry in it:
+                if entry.is_file(follow_symlinks=False):
+                    files.append(entry.path)
 
-    return was_stripped
+    if not files:
+        return False
+
+    # The strip command accepts many files so rather than starting a new
+    # process for each file, split them into one batch per job (default
+    # is one per CPU) and run those batches in parallel. Batches are
+    # capped in size to keep each command line well within ARG_MAX.
+    from concurrent.futures import ThreadPoolExecutor
+
+    def strip(batch: list[str]) -> None:
+        run(['strip', '-p', '--strip-unneeded', *batch], stderr=DEVNULL)
+
+    workers = min(jobs or os.cpu_count() or 1, len(files))
+    nbatches = max(workers, -(-len(files) // STRIP_BATCH_MAX))
+    batches = [files[n::nbatches] for n in range(nbatches)]
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(strip, batches))
+    except Exception:
+        return False
+
+    return True
 
 
 def install(
@@ -596,7 +979,7 @@ def install(
     if not (error := fetch(args, release, url, tmpdir)):
         data = {'release': release, 'distribution': distribution}
 
-        if not args.no_strip and strip_binaries(tmpdir, distribution):
+        if not args.no_strip and strip_binaries(tmpdir, distribution, args.jobs):
             data['stripped'] = 'true'
 
         if error := set_json(tmpdir / args._data, data):
@@ -605,15 +988,19 @@ def install(
     if error:
         shutil.rmtree(tmpdir)
     else:
-        remove(args, version)
+        remove(args, version, background=True)
         tmpdir.replace(vdir)
+        get_installed(args).add(version)
 
     return error
 
 
 def main() -> str | None:
     "Main code"
-    distro_default = DISTRIBUTIONS.get((platform.system(), platform.machine()))
+    import platformdirs
+
+    cnffile = platformdirs.user_config_path(f'{PROG}-flags.conf')
+    distro_default = DISTRIBUTIONS.get((SYSTEM, MACHINE))
     distro_help = distro_default or '?unknown?'
 
     p = '/opt' if is_admin() else platformdirs.user_data_dir()
@@ -625,7 +1012,7 @@ def main() -> str | None:
         description=__doc__,
         epilog='Some commands offer aliases as shown in parentheses above. '
         'Note you can set default starting global options in '
-        f'{CNFFILE}.',
+        f'{cnffile}.',
     )
 
     # Set up main/global arguments
@@ -670,6 +1057,13 @@ def main() -> str | None:
     opt.add_argument(
         '--no-strip', action='store_true', help='do not strip downloaded binaries'
     )
+    opt.add_argument(
+        '-j',
+        '--jobs',
+        type=int,
+        help='maximum number of parallel downloads and strip jobs. '
+        f'Default is {DOWNLOAD_WORKERS} downloads and one strip job per CPU',
+    )
     opt.add_argument(
         '-V', '--version', action='store_true', help=f'just show {PROG} version'
     )
@@ -698,19 +1092,28 @@ def main() -> str | None:
         if hasattr(cls, 'init'):
             cls.init(cmdopt)
 
+        # Commands which do not change installed versions can skip the
+        # symlink update and purge after they run
+        mutates = cls.mutates if hasattr(cls, 'mutates') else True
+
         # Set the function to call
-        cmdopt.set_defaults(func=cls.run, name=name, parser=cmdopt)
+        cmdopt.set_defaults(func=cls.run, name=name, parser=cmdopt, mutates=mutates)
 
-    # Command arguments are now defined, so we can set up argcomplete
-    argcomplete.autocomplete(opt)
+    # Command arguments are now defined, so we can set up argcomplete.
+    # Only import it when we are actually invoked for shell completion.
+    if '_ARGCOMPLETE' in os.environ:
+        import argcomplete
+
+        argcomplete.autocomplete(opt)
 
     # Merge in default args from user config file. Then parse the
     # command line.
-    cnffile = CNFFILE.expanduser()
+    cnffile = cnffile.expanduser()
     if cnffile.is_file():
-        with cnffile.open() as fp:
-            lines = [re.sub(r'#.*$', '', line).strip() for line in fp]
-        cnflines = ' '.join(lines).strip()
+        # Strip comments, i.e. anything after '#' on each line
+        cnflines = '\n'.join(
+            line.partition('#')[0] for line in cnffile.read_text().splitlines()
+        )
     else:
         cnflines = ''
 
@@ -724,6 +1127,9 @@ def main() -> str | None:
         opt.print_help()
         return None
 
+    if args.jobs is not None and args.jobs < 1:
+        opt.error('-j/--jobs must be at least 1')
+
     distribution = args.distribution or distro_default
     if not distribution:
         sys.exit(
@@ -740,6 +1146,7 @@ def main() -> str | None:
 
     args._versions = prefix_dir
     args._versions.mkdir(parents=True, exist_ok=True)
+    args._installed = None
 
     args._downloads = cache_dir / 'downloads'
     args._downloads.mkdir(parents=True, exist_ok=True)
@@ -748,8 +1155,10 @@ def main() -> str | None:
     args._latest_release = cache_dir / 'latest_release'
 
     result = args.func(args)
-    purge_unused_releases(args)
-    update_version_symlinks(args)
+    if args.mutates:
+        purge_unused_releases(args)
+        update_version_symlinks(args)
+
     return result
 
 
@@ -790,18 +1199,32 @@ class install_:
             return f'Release "{release}" not found, or has no compatible files.'
 
         matcher = VersionMatcher(files)
+
+        # Check all the requested versions before installing any
+        versions = []
         for version in args.version:
             full_version = matcher.match(version)
             if not full_version:
                 return f'Version {fmt(version, release)} not found.'
 
-            version = full_version
-            vdir = args._versions / version
+            if full_version in get_installed(args) and not args.force:
+                return f'Version "{full_version}" is already installed.'
 
-            if vdir.exists() and not args.force:
-                return f'Version "{version}" is already installed.'
+            if full_version not in versions:
+                versions.append(full_version)
 
-            if error := install(args, vdir, release, args._distribution, files):
+        # Download the files for all versions in parallel, before we
+        # install each one
+        distribution = args._distribution
+        download_all(
+            args,
+            release,
+            (url for v in versions if (url := files[v].get(distribution))),
+        )
+
+        for version in versions:
+            vdir = args._versions / version
+            if error := install(args, vdir, release, distribution, files):
                 return error
 
             print(f'Version {fmt(version, release)} installed.')
@@ -849,6 +1272,11 @@ class update_:
             return f'Release "{release_target}" not found.'
 
         matcher = VersionMatcher(files)
+
+        # Work out all the updates first, so we can then download their
+        # files in parallel before installing each one
+        jobs = []
+        targets = set()
         for version in get_version_names(args):
             vdir = args._versions / version
             if not (data := get_json(vdir / args._data)):
@@ -873,25 +1301,41 @@ class update_:
                 )
                 continue
 
-            new_vdir = args._versions / nextver
-            if nextver != version and new_vdir.exists():
+            # Skip if the new version is already installed, or will be
+            # by an earlier update in this run
+            if nextver != version and nextver in get_installed(args):
+                continue
+
+            if nextver in targets:
                 continue
 
+            # Report each planned update now, rather than after the
+            # downloads, which take the longest
             print(
                 f'{fmt(version, release)} updating to '
                 f'{fmt(nextver, release_target)} '
                 f'distribution="{distribution}" ..'
             )
+            targets.add(nextver)
+            jobs.append((version, nextver, distribution))
+
+        download_all(
+            args,
+            release_target,
+            (files[nextver][distribution] for _, nextver, distribution in jobs),
+        )
 
+        for version, nextver, distribution in jobs:
             # If the source was originally included, then include it in
             # the update.
-            args.include_source = (vdir / 'src').is_dir()
+            args.include_source = (args._versions / version / 'src').is_dir()
 
+            new_vdir = args._versions / nextver
             if error := install(args, new_vdir, release_target, distribution, files):
                 return error
 
             if nextver != version and not args.keep:
-                remove(args, version)
+                remove(args, version, background=True)
 
 
 # COMMAND
@@ -928,17 +1372,23 @@ class remove_:
             return err
 
         for version in get_version_names(args):
-            dfile = args._versions / version / args._data
-            release = get_json(dfile).get('release') or '?'
-            if not release_del or release == release_del:
-                remove(args, version)
-                print(f'Version {fmt(version, release)} removed.')
+            # Only need to read the release beforehand if filtering on
+            # it, otherwise remove() reads and returns it
+            if release_del:
+                dfile = args._versions / version / args._data
+                if get_json(dfile).get('release') != release_del:
+                    continue
+
+            release = remove(args, version) or '?'
+            print(f'Version {fmt(version, release)} removed.')
 
 
 # COMMAND
 class list_:
     "List installed versions and show which have an update available."
 
+    mutates = False
+
     @staticmethod
     def init(parser: ArgumentParser) -> None:
         parser.add_argument(
@@ -961,16 +1411,25 @@ class list_:
     @staticmethod
     def run(args: Namespace) -> str | None:
         release_target = get_release_tag(args)
-        files = get_release_files(args, release_target, 'cpython')
-        if not files:
-            return f'Release "{release_target}" not found.'
-
-        matcher = VersionMatcher(files)
         args.all = not args.version
         args.skip = False
-        for version in get_version_names(args):
-            vdir = args._versions / version
-            if not (data := get_json(vdir / args._data)):
+        versions = get_version_names(args)
+
+        # Only need to load the release files, and build the matcher, if
+        # some version is not up to date
+        files: dict = {}
+        matcher = None
+
+        # Bind loop invariants to locals
+        verbose = args.verbose
+        versions_dir = args._versions
+        data_name = args._data
+        installed = get_installed(args)
+
+        preload_json(versions_dir / v / data_name for v in versions)
+        lines = []
+        for version in versions:
+            if not (data := get_json(versions_dir / version / data_name)):
                 continue
 
             release = data.get('release')
@@ -978,21 +1437,26 @@ class list_:
             upd = ''
             app = ''
             if release_target and release != release_target:
+                if not matcher:
+                    files = get_release_files(args, release_target, 'cpython')
+                    if not files:
+                        return f'Release "{release_target}" not found.'
+
+                    matcher = VersionMatcher(files)
+
                 nextver = matcher.match(version, upgrade=True)
                 if not nextver:
-                    if args.verbose:
+                    if verbose:
                         app = (
                             ' not eligible for update because '
                             f'release {release_target} does not provide '
                             'this version.'
                         )
                 else:
-                    new_vdir = args._versions / nextver
-                    if nextver != version and new_vdir.exists():
-                        if args.verbose:
-                            nrelease = get_json(new_vdir / args._data).get(
-                                'release', '?'
-                            )
+                    if nextver != version and nextver in installed:
+                        if verbose:
+                            ndata = get_json(versions_dir / nextver / data_name)
+                            nrelease = ndata.get('release', '?')
                             app = (
                                 f' not eligible for '
                                 f'update because {fmt(nextver, nrelease)} '
@@ -1003,7 +1467,7 @@ class list_:
                         # this same distribution anymore
                         if nextver and distribution in files.get(nextver, {}):
                             upd = f' updatable to {fmt(nextver, release_target)}'
-                        elif args.verbose:
+                        elif verbose:
                             app = (
                                 ' not eligible for update because '
                                 f'{fmt(nextver, release_target)} does '
@@ -1011,7 +1475,13 @@ class list_:
                                 f'distribution="{distribution}".'
                             )
 
-            print(f'{fmt(version, release)}{upd} distribution="{distribution}"{app}')
+            lines.append(
+                f'{fmt(version, release)}{upd} distribution="{distribution}"{app}'
+            )
+
+        # Write all the output at once rather than a print() per line
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
 
 
 # COMMAND
@@ -1023,6 +1493,8 @@ class show_:
     {GITHUB_SITE}/releases.
     """
 
+    mutates = False
+
     @staticmethod
     def init(parser: ArgumentParser) -> None:
         group = parser.add_mutually_exclusive_group()
@@ -1064,27 +1536,46 @@ class show_:
             return f'Error: release "{release}" not found.'
 
         installed = {}
-        for vdir in iter_versions(args):
+        vdirs = [args._versions / v for v in get_installed(args)]
+        preload_json(v / args._data for v in vdirs)
+        for vdir in vdirs:
             data = get_json(vdir / args._data)
             if data.get('release') == release and (distro := data.get('distribution')):
                 installed[vdir.name] = distro
 
+        re_match = re.compile(args.re_match) if args.re_match else None
         installable = False
+        lines = []
+        target_distribution = args._distribution
         for version in sorted(files, key=parse_version):
             installed_distribution = installed.get(version)
-            for distribution in files[version]:
+            version_str = fmt(version, release)
+            distributions = files[version]
+            if not args.all:
+                # Only the target and installed distributions can be shown
+                # so just look those up, keeping them in release order
+                wanted = {target_distribution, installed_distribution}
+                distributions = [d for d in wanted if d in distributions]
+                if len(distributions) > 1:
+                    order = list(files[version])
+                    distributions.sort(key=order.index)
+
+            for distribution in distributions:
+                is_target = distribution == target_distribution
                 app = ' (installed)' if distribution == installed_distribution else ''
-                if args.all or app or distribution == args._distribution:
-                    if distribution == args._distribution:
-                        installable = True
-
-                    if not args.re_match or re.search(
-                        args.re_match, f'{version}+{distribution}'
-                    ):
-                        print(
-                            f'{fmt(version, release)} '
-                            f'distribution="{distribution}"{app}'
-                        )
+                if not (args.all or app or is_target):
+                    continue
+
+                if is_target:
+                    installable = True
+
+                if not re_match or re_match.search(f'{version}+{distribution}'):
+                    lines.append(f'{version_str} distribution="{distribution}"{app}')
+
+        # Write all the output at once rather than a print() per line
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
+
         if not installable:
             print(
                 f'Warning: no distribution="{args._distribution}" '
@@ -1097,6 +1588,8 @@ class show_:
 class path_:
     "Show path prefix to installed version base directory."
 
+    mutates = False
+
     @staticmethod
     def init(parser: ArgumentParser) -> None:
         parser.add_argument(